@@ -1,9 +1,12 @@
-from fastapi import FastAPI, WebSocket
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
+import math
 import os
+import time
 from collections import deque
+import orjson
 
 # optional dataset utilities (best-effort, requires pandas/numpy)
 try:
@@ -22,8 +25,36 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# Store last 60 seconds of data
-engine_history = deque(maxlen=60)
+# Store last 60 seconds of data as parallel ring buffers (slot = seq % HISTORY_SIZE)
+HISTORY_SIZE = 60
+_temps = [0.0] * HISTORY_SIZE
+_energies = [0.0] * HISTORY_SIZE
+_history_count = 0
+_sample_seq = 0  # total samples recorded; the next one goes to slot _sample_seq % HISTORY_SIZE
+
+# Running aggregates over the window so readers never rescan it
+_sum_temp = 0.0
+_energy_max = deque()  # seqs of decreasing energies in the window; front is the max
+
+
+def _record_sample(energy, temp):
+    """Append a sample to the history ring buffers and update the running aggregates."""
+    global _sum_temp, _sample_seq, _history_count
+    slot = _sample_seq % HISTORY_SIZE
+    if _energy_max and _energy_max[0] <= _sample_seq - HISTORY_SIZE:
+        _energy_max.popleft()
+    if _history_count == HISTORY_SIZE:
+        _sum_temp -= _temps[slot]
+    else:
+        _history_count += 1
+    _temps[slot] = temp
+    _energies[slot] = energy
+    _sum_temp += temp
+
+    while _energy_max and _energies[_energy_max[-1] % HISTORY_SIZE] <= energy:
+        _energy_max.pop()
+    _energy_max.append(_sample_seq)
+    _sample_seq += 1
 
 # Latest engine data
 engine_data = {
@@ -31,18 +62,58 @@ engine_data = {
     "temp": 300
 }
 
+# Pre-serialized /engine payload and its ETag, rebuilt only when engine_data
+# changes. The ETag carries a per-process prefix so a restart never reuses one.
+_etag_prefix = format(time.time_ns(), "x")
+_engine_version = 0
+_engine_etag = f'"{_etag_prefix}-0"'
+_engine_bytes = orjson.dumps(engine_data)
+
+
+def _publish_engine_data():
+    """Re-serialize engine_data for /engine and bump its ETag."""
+    global _engine_version, _engine_etag, _engine_bytes
+    _engine_version += 1
+    _engine_etag = f'"{_etag_prefix}-{_engine_version}"'
+    _engine_bytes = orjson.dumps(engine_data)
+
 # If a dataset file is provided via environment variable, try to load and expose metrics
 DATASET_CSV = os.getenv("DATASET_CSV")
+# Optional: stream .txt/.csv datasets in chunks of this many rows (low-memory hosts)
+DATASET_CHUNKSIZE = int(os.getenv("DATASET_CHUNKSIZE", "0")) or None
+# Computed lazily on the first /dataset-metrics request, off the event loop
 _dataset_info = None
-if DATASET_CSV and dataset_summary is not None:
-    try:
-        _dataset_info = dataset_summary(DATASET_CSV)
-    except Exception as e:
-        _dataset_info = {"error": f"Failed to load dataset: {str(e)}"}
+_dataset_lock = asyncio.Lock()
+
+
+async def _get_dataset_info():
+    """Return the dataset summary, computing it in a worker thread on first use."""
+    global _dataset_info
+    async with _dataset_lock:
+        if _dataset_info is None:
+            try:
+                _dataset_info = await asyncio.get_running_loop().run_in_executor(
+                    None, dataset_summary, DATASET_CSV, DATASET_CHUNKSIZE)
+            except Exception as e:
+                _dataset_info = {"error": f"Failed to load dataset: {str(e)}"}
+    return _dataset_info
+
+def _etag_matches(if_none_match, etag):
+    """Weak If-None-Match comparison: comma-separated tags, W/ prefixes and "*"."""
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
 
 @app.get("/engine")
-async def get_engine_data():
-    return JSONResponse(engine_data)
+async def get_engine_data(request: Request):
+    if _etag_matches(request.headers.get("if-none-match"), _engine_etag):
+        return Response(status_code=304, headers={"ETag": _engine_etag})
+    return Response(_engine_bytes, media_type="application/json", headers={"ETag": _engine_etag})
 
 
 @app.get("/dataset-metrics")
@@ -56,17 +127,15 @@ async def dataset_metrics():
         return JSONResponse({"available": False, "reason": "DATASET_CSV not set"})
     if dataset_summary is None:
         return JSONResponse({"available": False, "reason": "dataset utilities not available (install pandas/numpy)"})
-    return JSONResponse({"available": True, "summary": _dataset_info})
+    return JSONResponse({"available": True, "summary": await _get_dataset_info()})
 
 @app.get("/dashboard")
 async def dashboard():
-    if engine_history:
-        temps = [d['temp'] for d in engine_history]
-        energies = [d['energy'] for d in engine_history]
-        avg_temp = sum(temps) / len(temps)
-        max_energy = max(energies)
-        predicted_overheat = temps[-1] + 50
-        alert = predicted_overheat > 550
+    if _history_count:
+        avg_temp = _sum_temp / _history_count
+        max_energy = _energies[_energy_max[0] % HISTORY_SIZE]
+        predicted_overheat = _temps[(_sample_seq - 1) % HISTORY_SIZE] + OVERHEAT_MARGIN
+        alert = predicted_overheat > OVERHEAT_LIMIT
     else:
         avg_temp = 0
         max_energy = 0
@@ -79,39 +148,121 @@ async def dashboard():
             <h1>Engine Digital Twin Dashboard</h1>
             <p>Current Temperature: {engine_data['temp']:.1f} °C</p>
             <p>Current Energy: {engine_data['energy']:.1f} kW</p>
-            <p>Average Temperature (last {len(engine_history)}s): {avg_temp:.1f} °C</p>
-            <p>Max Energy (last {len(engine_history)}s): {max_energy:.1f} kW</p>
+            <p>Average Temperature (last {_history_count}s): {avg_temp:.1f} °C</p>
+            <p>Max Energy (last {_history_count}s): {max_energy:.1f} kW</p>
             <p>Predicted Overheat: {"YES" if alert else "NO"}</p>
         </body>
     </html>
     """
     return HTMLResponse(html)
 
+# Upper bound on samples coalesced into one outgoing frame
+WS_MAX_BATCH = 256
+
+# Overheat prediction: alert when temp + OVERHEAT_MARGIN exceeds OVERHEAT_LIMIT
+OVERHEAT_MARGIN = 50
+OVERHEAT_LIMIT = 550
+
+
+async def _pump_messages(websocket: WebSocket, queue: asyncio.Queue):
+    """Move incoming JSON messages onto queue; enqueue the exception on disconnect.
+
+    Frames are decoded with orjson straight from the raw ASGI message, binary
+    or text, bypassing Starlette's receive_json. The queue is bounded, so
+    while replies are stuck on a slow client the pump stops reading and TCP
+    flow control pushes back on the sender.
+    """
+    while True:
+        try:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            payload = message.get("bytes")
+            msg = orjson.loads(payload if payload is not None else message["text"])
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(msg)
+
+
 @app.websocket("/ws/engine")
 async def websocket_endpoint(websocket: WebSocket):
+    """Receive telemetry from the 3D model and reply with analytics.
+
+    Messages that queue up while a reply is being sent are drained and
+    answered together as {"batch": [...]}, one entry per sample in arrival
+    order, so high-rate senders cost one frame per drain rather than per
+    sample. A lone message is still answered immediately as a batch of one.
+    Replies are orjson-encoded binary frames.
+    """
     await websocket.accept()
-    while True:
-        try:
-            msg = await websocket.receive_json()  # receive data from 3D model
-            engine_data["energy"] = msg["energy"]
-            engine_data["temp"] = msg["temp"]
+    queue = asyncio.Queue(maxsize=WS_MAX_BATCH)
+    reader = asyncio.create_task(_pump_messages(websocket, queue))
+    # one reply entry per connection, updated in place and serialized per sample
+    out = {"energy": 0.0, "temp": 0.0, "avg_temp": 0.0, "predicted_overheat": 0.0, "alert": False}
+    try:
+        while True:
+            # block for the first message, then drain whatever is already queued
+            batch = [await queue.get()]
+            while len(batch) < WS_MAX_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
 
-            # store in history
-            engine_history.append({"energy": engine_data["energy"], "temp": engine_data["temp"]})
+            samples = []  # (energy, temp, avg_temp) per message
+            try:
+                for msg in batch:
+                    if isinstance(msg, Exception):
+                        raise msg
+                    # validate before touching shared state: a bad value must
+                    # leave the window aggregates untouched (earlier samples in
+                    # the batch stay recorded and are published below)
+                    energy = float(msg["energy"])
+                    temp = float(msg["temp"])
+                    if not (math.isfinite(energy) and math.isfinite(temp)):
+                        raise ValueError(f"non-finite sample: energy={energy}, temp={temp}")
+                    engine_data["energy"] = energy
+                    engine_data["temp"] = temp
 
-            # analytics
-            avg_temp = sum(d['temp'] for d in engine_history)/len(engine_history)
-            predicted_overheat = engine_data["temp"] + 50
-            alert = predicted_overheat > 550
+                    # store in history
+                    _record_sample(engine_data["energy"], engine_data["temp"])
+
+                    # analytics
+                    samples.append((engine_data["energy"], engine_data["temp"], _sum_temp / _history_count))
+            finally:
+                # publish whatever was recorded, even if a later message in
+                # the batch is bad or is the disconnect
+                if samples:
+                    _publish_engine_data()
 
             # send back current state + analytics
-            await websocket.send_json({
-                "energy": engine_data["energy"],
-                "temp": engine_data["temp"],
-                "avg_temp": avg_temp,
-                "predicted_overheat": predicted_overheat,
-                "alert": alert
-            })
-        except Exception as e:
-            print("WebSocket disconnected:", e)
-            break
+            entries = []
+            for energy, temp, avg_temp in samples:
+                out["energy"] = energy
+                out["temp"] = temp
+                out["avg_temp"] = avg_temp
+                out["predicted_overheat"] = temp + OVERHEAT_MARGIN
+                out["alert"] = out["predicted_overheat"] > OVERHEAT_LIMIT
+                entries.append(orjson.dumps(out))
+            await websocket.send_bytes(b'{"batch":[' + b",".join(entries) + b"]}")
+    except Exception as e:
+        print("WebSocket disconnected:", e)
+    finally:
+        reader.cancel()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop event loop + httptools C parser, no per-request access logging.
+    # Engine state lives in module globals, so each worker has its own copy:
+    # keep WEB_CONCURRENCY=1 unless the load balancer pins each client
+    # (WebSocket and HTTP) to a single worker.
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level="warning",
+        access_log=False,
+    )
@@ -4,11 +4,30 @@ Supports space-delimited .txt, .csv, .xlsx formats.
 Computes engine efficiency / degradation metrics from raw sensor data.
 """
 import os
+import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from typing import Dict, Tuple, Optional
 
+# optional JIT for the slope kernel (falls back to the numpy path without numba)
+try:
+    from numba import njit, prange
+except Exception:
+    njit = None
+
+
+def _text_read_kwargs(path: str) -> Dict:
+    """pd.read_csv keyword arguments for a delimited (.txt or .csv) dataset file."""
+    if path.lower().endswith('.txt'):
+        # Assume space-delimited (NASA CMAPSS format). A bare r'\s+' separator
+        # is special-cased by pandas onto the C tokenizer; pin engine='c' so it
+        # never silently falls back to the Python engine, and parse straight
+        # into float32 (CMAPSS readings carry ~4 significant digits).
+        return {"sep": r'\s+', "engine": 'c', "dtype": np.float32}
+    # Try CSV
+    return {}
+
 
 def load_aircraft_dataset(path: str) -> pd.DataFrame:
     """Load aircraft sensor data from .txt, .csv, or .xlsx file.
@@ -20,7 +39,8 @@ def load_aircraft_dataset(path: str) -> pd.DataFrame:
         path: Path to the data file (.txt, .csv, or .xlsx).
     
     Returns:
-        DataFrame with raw sensor data.
+        DataFrame with raw sensor data: columns 0-1 (unit ID, cycle) as int32,
+        remaining sensor columns as float32.
     
     Raises:
         FileNotFoundError if file doesn't exist.
@@ -30,20 +50,127 @@ def load_aircraft_dataset(path: str) -> pd.DataFrame:
     
     if path.lower().endswith(('.xlsx', '.xls')):
         df = pd.read_excel(path, header=None)
-    elif path.lower().endswith('.txt'):
-        # Assume space-delimited (NASA CMAPSS format)
-        df = pd.read_csv(path, sep=r'\s+', header=None)
     else:
-        # Try CSV
-        df = pd.read_csv(path, header=None)
+        df = pd.read_csv(path, header=None, **_text_read_kwargs(path))
+    
+    # Narrow dtypes: unit IDs and cycles fit in int32, sensor readings in
+    # float32. This halves the size of the loaded frame; the degradation math
+    # still converts to float64 before accumulating.
+    dtypes = {col: np.float32 for col in df.columns[2:]}
+    dtypes.update({col: np.int32 for col in df.columns[:2]})
+    df = df.astype(dtypes, copy=False)
     
     return df
 
 
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _slopes_kernel(starts, ends, cyc, sens, out):
+        """Fill out[u, s] with the slope of sens[:, s] vs cyc over rows starts[u]:ends[u].
+        
+        Rows must be grouped by unit. Pairs with fewer than two valid points or
+        constant cycles are left as NaN.
+        """
+        for u in prange(len(starts)):
+            lo = starts[u]
+            hi = ends[u]
+            for s in range(sens.shape[1]):
+                n = 0
+                mx = 0.0
+                my = 0.0
+                for i in range(lo, hi):
+                    y = sens[i, s]
+                    if not np.isnan(y):
+                        n += 1
+                        mx += cyc[i]
+                        my += y
+                if n < 2:
+                    continue
+                mx /= n
+                my /= n
+                sxx = 0.0
+                sxy = 0.0
+                for i in range(lo, hi):
+                    y = sens[i, s]
+                    if not np.isnan(y):
+                        dx = cyc[i] - mx
+                        sxx += dx * dx
+                        sxy += dx * (y - my)
+                if sxx > 0.0:
+                    out[u, s] = sxy / sxx
+else:
+    _slopes_kernel = None
+
+
+def _unit_sensor_slopes(starts: np.ndarray,
+                        counts: np.ndarray,
+                        cycles: np.ndarray,
+                        sensors: np.ndarray,
+                        has_nans: bool = True) -> np.ndarray:
+    """Least-squares slope of every sensor against cycle, for every unit.
+    
+    Rows must be grouped by unit: unit u owns rows starts[u]:starts[u] + counts[u]
+    of cycles (n_rows,) and sensors (n_rows, n_sensors), all float64. Uses the
+    closed form cov(x, y) / var(x), reducing every sensor of every unit in one
+    np.add.reduceat pass (or the numba kernel when available) instead of one
+    np.polyfit call per (unit, sensor). NaN readings are excluded pairwise,
+    like the valid-index mask did before; pass has_nans=False when sensors is
+    known to be NaN-free to skip building and applying the masks.
+    
+    Returns:
+        Flat array of slopes for (unit, sensor) pairs with at least two
+        valid points and non-constant cycles.
+    """
+    if _slopes_kernel is not None:
+        out = np.full((len(starts), sensors.shape[1]), np.nan)
+        _slopes_kernel(starts, starts + counts, cycles, np.ascontiguousarray(sensors), out)
+        return out[~np.isnan(out)]
+    
+    n_sensors = sensors.shape[1]
+    if not has_nans:
+        # Every point is valid: same n, sum(x) and sum(xx) for all sensors of a unit
+        dx = cycles - np.repeat(np.add.reduceat(cycles, starts) / counts, counts)
+        dy = sensors - np.repeat(np.add.reduceat(sensors, starts) / counts[:, None], counts, axis=0)
+        sums = np.add.reduceat(np.hstack([dy, dx[:, None] * dy]), starts)
+        shape = (len(starts), n_sensors)
+        n = np.broadcast_to(counts[:, None].astype(np.float64), shape)
+        sx = np.broadcast_to(np.add.reduceat(dx, starts)[:, None], shape)
+        sxx = np.broadcast_to(np.add.reduceat(dx * dx, starts)[:, None], shape)
+        return _slopes_from_sums(n, sx, sums[:, :n_sensors], sxx, sums[:, n_sensors:])
+    
+    valid = ~np.isnan(sensors)
+    n = np.add.reduceat(valid.astype(np.float64), starts)
+    
+    # Center on the per-unit means first; slopes are shift-invariant and this
+    # keeps the sums below well conditioned.
+    mean_x = np.add.reduceat(cycles, starts) / counts
+    mean_y = np.add.reduceat(np.where(valid, sensors, 0.0), starts) / np.maximum(n, 1)
+    dx = np.where(valid, (cycles - np.repeat(mean_x, counts))[:, None], 0.0)
+    dy = np.where(valid, sensors - np.repeat(mean_y, counts, axis=0), 0.0)
+    
+    # One segmented pass for sum(x), sum(y), sum(xx), sum(xy) of every sensor
+    sums = np.add.reduceat(np.hstack([dx, dy, dx * dx, dx * dy]), starts)
+    sx, sy, sxx, sxy = (sums[:, i * n_sensors:(i + 1) * n_sensors] for i in range(4))
+    
+    return _slopes_from_sums(n, sx, sy, sxx, sxy)
+
+
+def _slopes_from_sums(n, sx, sy, sxx, sxy) -> np.ndarray:
+    """Least-squares slopes from per-(unit, sensor) sums over valid points.
+    
+    Returns:
+        Flat array of slopes where n > 1 and the cycles are not constant.
+    """
+    denom = n * sxx - sx * sx
+    ok = (n > 1) & (denom > 0)
+    return ((n * sxy - sx * sy)[ok] / denom[ok]).ravel()
+
+
 def compute_engine_degradation(df: pd.DataFrame, 
                                unit_id_col: int = 0,
                                cycle_col: int = 1,
-                               sensor_cols: Optional[list] = None) -> Tuple[Dict, pd.DataFrame]:
+                               sensor_cols: Optional[list] = None,
+                               has_nans: Optional[bool] = None) -> Tuple[Dict, pd.DataFrame]:
     """Compute engine degradation metrics from sensor data.
     
     For each unit (engine), computes:
@@ -52,70 +179,229 @@ def compute_engine_degradation(df: pd.DataFrame,
     - Mean and std of key sensors
     
     Args:
-        df: DataFrame with columns: [unit_id, cycle, ...sensors...]
+        df: DataFrame with columns: [unit_id, cycle, ...sensors...].
+            Enriched in place (no defensive copy), so pass a frame you own,
+            e.g. a fresh load_aircraft_dataset() result or df.copy().
         unit_id_col: Column index for unit/engine ID (default: 0)
         cycle_col: Column index for cycle/time step (default: 1)
         sensor_cols: List of column indices to use for degradation (default: all except first 2)
+        has_nans: Whether sensor columns may contain NaN. None (default) detects
+            it with one pass; False skips all NaN masking in the slope fit.
     
     Returns:
         (summary_dict, enriched_df) where:
         - summary_dict has keys: mean_rul, max_rul, mean_sensor_degradation, etc.
-        - enriched_df is df with added 'RUL' column
+        - enriched_df is df itself with an added 'RUL' column and the unit ID
+          column converted to categorical
     """
     if sensor_cols is None:
         sensor_cols = list(range(2, df.shape[1]))
     
-    # Copy to avoid mutating input
-    df_enrich = df.copy()
+    # Work on the caller's frame directly; copying would double peak memory
+    df_enrich = df
     
-    # Compute RUL for each unit
-    max_cycle_per_unit = df_enrich.groupby(unit_id_col)[cycle_col].max()
+    # Categorical unit IDs: per-unit work runs on dense integer codes instead
+    # of hashing every row
+    df_enrich[unit_id_col] = df_enrich[unit_id_col].astype('category').cat.remove_unused_categories()
+    codes = df_enrich[unit_id_col].cat.codes.to_numpy()
     
-    def compute_rul(row):
-        unit = row[unit_id_col]
-        cycle = row[cycle_col]
-        return max_cycle_per_unit[unit] - cycle
+    # Sort once (skipped when rows are already grouped by unit, as in CMAPSS)
+    # so every unit is a contiguous slice starts[u]:starts[u] + counts[u]
+    order = None if np.all(codes[1:] >= codes[:-1]) else np.argsort(codes, kind='stable')
+    counts = np.bincount(codes)
+    starts = np.cumsum(counts) - counts
+    cycles = df_enrich[cycle_col].to_numpy()
+    sensors = df_enrich[sensor_cols].to_numpy(dtype=np.float64)
+    if order is not None:
+        cycles = cycles[order]
+        sensors = sensors[order]
     
-    df_enrich['RUL'] = df_enrich.apply(compute_rul, axis=1)
+    # Compute RUL for each unit (max cycle gathered by category code)
+    max_cycle = np.maximum.reduceat(cycles, starts)
+    df_enrich['RUL'] = max_cycle[codes] - df_enrich[cycle_col].to_numpy()
     
     # Compute sensor degradation (slope of sensor values over time per unit)
-    degradation_slopes = []
-    for unit_id in df_enrich[unit_id_col].unique():
-        unit_data = df_enrich[df_enrich[unit_id_col] == unit_id]
-        for sensor_idx in sensor_cols:
-            # Simple linear regression: compute slope of sensor vs cycle
-            X = unit_data[cycle_col].values
-            y = unit_data[sensor_idx].values
-            if len(X) > 1 and not np.all(np.isnan(y)):
-                # Fit a line
-                valid_idx = ~np.isnan(y)
-                if valid_idx.sum() > 1:
-                    slope = np.polyfit(X[valid_idx], y[valid_idx], 1)[0]
-                    degradation_slopes.append(slope)
+    if has_nans is None:
+        has_nans = bool(np.isnan(sensors).any())
+    degradation_slopes = _unit_sensor_slopes(starts, counts, cycles.astype(np.float64), sensors, has_nans)
     
     # Summary metrics
     summary = {
         "rows": int(len(df_enrich)),
-        "units": int(df_enrich[unit_id_col].nunique()),
+        "units": int(len(counts)),
         "mean_rul": float(np.mean(df_enrich['RUL'])),
         "max_rul": float(np.max(df_enrich['RUL'])),
         "min_rul": float(np.min(df_enrich['RUL'])),
-        "mean_sensor_degradation_slope": float(np.mean(degradation_slopes)) if degradation_slopes else None,
+        "mean_sensor_degradation_slope": float(np.mean(degradation_slopes)) if degradation_slopes.size else None,
         "num_sensors": int(len(sensor_cols))
     }
     
     return summary, df_enrich
 
 
-def dataset_summary(path: str) -> Dict:
+def stream_engine_degradation(path: str,
+                              unit_id_col: int = 0,
+                              cycle_col: int = 1,
+                              sensor_cols: Optional[list] = None,
+                              chunksize: int = 100_000) -> Dict:
+    """Compute the compute_engine_degradation summary by streaming a text file.
+    
+    Reads .txt/.csv files in chunks and folds per-unit running sums (row
+    count, cycle sum/min/max, and n, sum(x), sum(y), sum(xx), sum(xy) per
+    sensor) across chunks, deriving RUL stats and slopes at the end. Peak
+    memory is one chunk plus O(units * sensors), so it suits datasets too
+    large to hold in memory.
+    
+    Args:
+        path: Path to a .txt or .csv data file.
+        unit_id_col: Column index for unit/engine ID (default: 0)
+        cycle_col: Column index for cycle/time step (default: 1)
+        sensor_cols: List of column indices to use for degradation (default: all except first 2)
+        chunksize: Rows per chunk read from disk.
+    
+    Returns:
+        Summary dict with the same keys as compute_engine_degradation.
+    
+    Raises:
+        FileNotFoundError if file doesn't exist.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    
+    # unit_id -> [rows, sum_cycle, min_cycle, max_cycle, n | sx | sy | sxx | sxy per sensor],
+    # with cycles and sensors measured from the first row's values
+    acc = {}
+    x_ref = None
+    y_ref = None
+    reader = pd.read_csv(path, header=None, chunksize=chunksize, **_text_read_kwargs(path))
+    for chunk in reader:
+        if sensor_cols is None:
+            sensor_cols = list(range(2, chunk.shape[1]))
+        
+        x = chunk[cycle_col].to_numpy(dtype=np.float64)
+        y = chunk[sensor_cols].to_numpy(dtype=np.float64)
+        if y_ref is None:
+            # Shift cycles and sensors by fixed references so the raw sums stay
+            # small; slopes and the RUL stats below are shift-invariant.
+            x_ref = x[0]
+            y_ref = np.nan_to_num(y[0])
+        x = x - x_ref
+        y = y - y_ref
+        valid = ~np.isnan(y)
+        xv = np.where(valid, x[:, None], 0.0)
+        yv = np.where(valid, y, 0.0)
+        
+        unit_ids = chunk[unit_id_col].to_numpy()
+        cycles = pd.Series(x).groupby(unit_ids).agg(['count', 'sum', 'min', 'max'])
+        sums = pd.DataFrame(np.hstack([valid, xv, yv, xv * xv, xv * yv])).groupby(unit_ids).sum()
+        
+        for uid, stats in zip(cycles.index, np.hstack([cycles.to_numpy(), sums.to_numpy()])):
+            prev = acc.get(uid)
+            if prev is None:
+                acc[uid] = stats
+                continue
+            prev[2] = min(prev[2], stats[2])
+            prev[3] = max(prev[3], stats[3])
+            prev[[0, 1]] += stats[[0, 1]]
+            prev[4:] += stats[4:]
+    
+    stats = np.vstack(list(acc.values()))
+    rows, sum_cycle, min_cycle, max_cycle = stats[:, :4].T
+    n_sensors = len(sensor_cols)
+    n, sx, sy, sxx, sxy = (stats[:, 4 + i * n_sensors:4 + (i + 1) * n_sensors] for i in range(5))
+    degradation_slopes = _slopes_from_sums(n, sx, sy, sxx, sxy)
+    
+    total_rows = rows.sum()
+    return {
+        "rows": int(total_rows),
+        "units": int(len(acc)),
+        "mean_rul": float((rows * max_cycle - sum_cycle).sum() / total_rows),
+        "max_rul": float(np.max(max_cycle - min_cycle)),
+        # the last cycle of every unit has RUL 0
+        "min_rul": 0.0,
+        "mean_sensor_degradation_slope": float(np.mean(degradation_slopes)) if degradation_slopes.size else None,
+        "num_sensors": int(n_sensors)
+    }
+
+
+# Bump whenever the summary computation changes, so stale sidecars are ignored
+SUMMARY_CACHE_VERSION = 1
+
+
+def _summary_sidecar(path: str) -> Path:
+    """Location of the cached summary for a dataset file."""
+    return Path(path + ".summary.json")
+
+
+def _read_cached_summary(path: str, st: os.stat_result) -> Optional[Dict]:
+    """Return the sidecar summary if it was computed from this exact file version."""
+    try:
+        with open(_summary_sidecar(path)) as f:
+            cached = json.load(f)
+        meta = cached["meta"]
+        if (meta.get("version") == SUMMARY_CACHE_VERSION
+                and meta["mtime_ns"] == st.st_mtime_ns and meta["size"] == st.st_size):
+            return cached["summary"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_cached_summary(path: str, st: os.stat_result, summary: Dict) -> None:
+    """Atomically write the summary sidecar; best-effort (e.g. read-only data dirs)."""
+    sidecar = _summary_sidecar(path)
+    tmp = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"meta": {"version": SUMMARY_CACHE_VERSION,
+                                "mtime_ns": st.st_mtime_ns, "size": st.st_size},
+                       "summary": summary}, f)
+        os.replace(tmp, sidecar)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def dataset_summary(path: str, chunksize: Optional[int] = None) -> Dict:
     """Load dataset and return summary with degradation metrics.
     
+    Successful summaries are memoized in a `<path>.summary.json` sidecar keyed
+    by the file's mtime and size plus SUMMARY_CACHE_VERSION, so restarts, reloads and extra workers read
+    the cached result instead of re-parsing the dataset.
+    
     Args:
         path: Path to aircraft sensor dataset file.
+        chunksize: If set, stream .txt/.csv files in chunks of this many rows
+            via stream_engine_degradation instead of loading them whole.
     
     Returns:
         Dictionary with summary stats and degradation metrics.
     """
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is not None:
+        cached = _read_cached_summary(path, st)
+        if cached is not None:
+            return cached
+    
+    summary = _compute_summary(path, chunksize)
+    if st is not None and "error" not in summary:
+        _write_cached_summary(path, st, summary)
+    return summary
+
+
+def _compute_summary(path: str, chunksize: Optional[int]) -> Dict:
+    """Uncached body of dataset_summary."""
+    if chunksize and not path.lower().endswith(('.xlsx', '.xls')):
+        try:
+            return stream_engine_degradation(path, chunksize=chunksize)
+        except Exception as e:
+            return {"error": f"Failed to compute metrics: {str(e)}"}
+    
     try:
         df = load_aircraft_dataset(path)
     except Exception as e: